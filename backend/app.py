@@ -5,21 +5,34 @@ AI 播客生成工具 - Flask 后端服务
 
 import os
 import sys
+import time
 import uuid
-import json
+import hashlib
 import logging
+import functools
 import threading
-from flask import Flask, request, jsonify, Response, send_file, send_from_directory
+import mimetypes
+import orjson
+import requests
+from queue import Queue, Empty
+from urllib.parse import quote, urldefrag
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import Flask, request, jsonify, Response, abort, send_file, send_from_directory
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from werkzeug.exceptions import BadRequest, HTTPException, RequestEntityTooLarge
+from werkzeug.utils import secure_filename, safe_join
 
 # 添加backend目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from config import UPLOAD_DIR, OUTPUT_DIR, BGM_FILES
+from config import UPLOAD_DIR, OUTPUT_DIR, BGM_FILES, DEFAULT_VOICES, DOWNLOAD_CONFIG, UPLOAD_LIMITS, MINIMAX_API_KEY
 from content_parser import content_parser
 from voice_manager import voice_manager
 from podcast_generator import podcast_generator
+from upload_utils import parse_upload_form, discard_uploads
+from sse_utils import SSEBatcher, SSE_PREAMBLE, SSE_HEARTBEAT, encode_event
 
 # 配置日志
 logging.basicConfig(
@@ -28,18 +41,171 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Flask 应用
-app = Flask(__name__)
+# 关闭 Werkzeug 的逐请求访问日志，仅保留警告及以上
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+# Flask 应用（关闭内置的 /static 路由，由 serve_static 提供 BGM 文件）
+app = Flask(__name__, static_folder=None)
+app.use_x_sendfile = DOWNLOAD_CONFIG["use_x_sendfile"]
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_LIMITS["max_content_length"]
 CORS(app)
 
+# OSS 下载共享会话，复用 keep-alive 连接
+_OSS_SESSION = requests.Session()
+_OSS_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+
+def _create_io_pool():
+    """
+    创建内容解析线程池
+
+    在 gevent worker 下（threading 已被打补丁）使用 gevent 的原生线程池，
+    避免 PyPDF2 等 CPU 密集的解析阻塞事件循环
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=8)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix='content-parse')
+
+
+# 音色准备池大小：系统线程 / gevent worker 下的 greenlet（与 --worker-connections 一致）
+VOICE_POOL_SIZE = 32
+GEVENT_VOICE_POOL_SIZE = 1000
+
+
+def _create_voice_pool():
+    """
+    创建音色准备线程池
+
+    音色准备以网络请求（上传、克隆）和 ffmpeg 子进程为主，耗时长但不占 CPU，
+    与内容解析分开，避免慢速克隆占满解析线程。gevent worker 下 threading 已被打补丁，
+    池中的线程即 greenlet，按连接数放宽上限，保持协作式执行
+    """
+    max_workers = VOICE_POOL_SIZE
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            max_workers = GEVENT_VOICE_POOL_SIZE
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='voice-prepare')
+
+
+# 内容解析任务的共享线程池，避免阻塞 SSE 生成器
+_IO_POOL = _create_io_pool()
+
+# 音色准备（克隆）任务的独立线程池
+_VOICE_POOL = _create_voice_pool()
+
+# 等待后台任务时发送心跳的间隔（秒）
+HEARTBEAT_INTERVAL = 10
+
+
+def wait_with_heartbeat(future):
+    """
+    等待后台任务完成，期间定期产出 SSE 心跳帧
+
+    用法: result = yield from wait_with_heartbeat(future)
+    """
+    while True:
+        try:
+            return future.result(timeout=HEARTBEAT_INTERVAL)
+        except FutureTimeoutError:
+            yield SSE_HEARTBEAT
+
+# 默认音色列表在启动时序列化一次，ETag 取内容摘要
+_DEFAULT_VOICES_JSON = orjson.dumps({"success": True, "voices": DEFAULT_VOICES})
+_DEFAULT_VOICES_ETAG = hashlib.sha256(_DEFAULT_VOICES_JSON).hexdigest()[:32]
+
+# 静态资源的客户端缓存时长（秒）
+DEFAULT_VOICES_MAX_AGE = 3600
+BGM_MAX_AGE = 86400
+
+# 封面代理透传的条件请求头 / 缓存校验头
+_COVER_CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+_COVER_VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+# 可直接访问的 BGM 文件
+_BGM_MAP = {
+    'bgm01.wav': BGM_FILES["bgm01"],
+    'bgm02.wav': BGM_FILES["bgm02"]
+}
+
+# 上传文件名清洗结果缓存，上传目录前缀预先拼好
+_safe_name = functools.lru_cache(maxsize=1024)(secure_filename)
+_UPLOAD_DIR_SEP = UPLOAD_DIR.rstrip(os.sep) + os.sep
+
 # 允许的文件扩展名
-ALLOWED_AUDIO_EXTENSIONS = {'wav', 'mp3', 'flac', 'm4a', 'ogg'}
-ALLOWED_PDF_EXTENSIONS = {'pdf'}
+ALLOWED_AUDIO_EXTENSIONS = frozenset({'wav', 'mp3', 'flac', 'm4a', 'ogg'})
+ALLOWED_PDF_EXTENSIONS = frozenset({'pdf'})
+
+# 预先拼好的后缀元组，供 str.endswith 一次匹配
+_AUDIO_SUFFIXES = tuple('.' + ext for ext in ALLOWED_AUDIO_EXTENSIONS)
+_PDF_SUFFIXES = tuple('.' + ext for ext in ALLOWED_PDF_EXTENSIONS)
 
 
-def allowed_file(filename, allowed_extensions):
+def allowed_file(filename, suffixes):
     """检查文件扩展名是否允许"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return filename.lower().endswith(suffixes)
+
+
+def send_output_file(filename):
+    """
+    发送输出目录中的文件（附件形式）
+
+    配置了 X-Accel-Redirect 前缀时只返回响应头，由 Nginx 直接发送文件；
+    否则使用 send_from_directory（支持 ETag / Range 条件请求，X-Sendfile 开启时同样交给前端服务器）
+    """
+    prefix = DOWNLOAD_CONFIG["x_accel_redirect_prefix"]
+    if not prefix:
+        return send_from_directory(OUTPUT_DIR, filename, as_attachment=True, conditional=True, etag=True)
+
+    file_path = safe_join(OUTPUT_DIR, filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+
+    resp = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+    resp.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(filename)
+    resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return resp
+
+
+def _warmup():
+    """启动时预热内容解析（PDF / HTML 解析器），避免首个请求承担冷启动开销"""
+    try:
+        content_parser.warmup()
+        logger.info("预热完成")
+    except Exception as e:
+        logger.warning("预热失败（不影响服务启动）: %s", e)
+
+
+_warmup()
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def handle_request_too_large(e):
+    """上传内容超出大小限制"""
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({
+        "success": False,
+        "error": e.description if e.description != RequestEntityTooLarge.description else f"上传内容不能超过 {limit_mb} MB"
+    }), 413
+
+
+@app.errorhandler(BadRequest)
+def handle_bad_request(e):
+    """请求内容不完整或格式错误（如上传被截断）"""
+    return jsonify({
+        "success": False,
+        "error": e.description
+    }), 400
 
 
 @app.route('/health', methods=['GET'])
@@ -51,11 +217,10 @@ def health_check():
 @app.route('/api/default-voices', methods=['GET'])
 def get_default_voices():
     """获取默认音色列表"""
-    from config import DEFAULT_VOICES
-    return jsonify({
-        "success": True,
-        "voices": DEFAULT_VOICES
-    })
+    resp = Response(_DEFAULT_VOICES_JSON, mimetype='application/json')
+    resp.headers['Cache-Control'] = f'public, max-age={DEFAULT_VOICES_MAX_AGE}, immutable'
+    resp.set_etag(_DEFAULT_VOICES_ETAG)
+    return resp.make_conditional(request)
 
 
 @app.route('/api/generate_podcast', methods=['POST'])
@@ -74,105 +239,144 @@ def generate_podcast():
     - speaker2_voice_name: "mini" 或 "max"（default 时）
     - speaker2_audio: 音频文件（custom 时）
     """
-    # 在请求上下文中提取所有数据
+    # 在请求上下文中提取所有数据（先生成 session_id，流式解析时文件可直接写盘）
     session_id = str(uuid.uuid4())
-    logger.info(f"开始生成播客，Session ID: {session_id}")
+    logger.info("开始生成播客，Session ID: %s", session_id)
+
+    form, files = parse_upload_form(
+        ['api_key', 'text_input', 'url', 'speaker1_type', 'speaker1_voice_name',
+         'speaker2_type', 'speaker2_voice_name'],
+        {
+            'pdf_file': f"{_UPLOAD_DIR_SEP}{session_id}_pdf_file.part",
+            'speaker1_audio': f"{_UPLOAD_DIR_SEP}{session_id}_speaker1_audio.part",
+            'speaker2_audio': f"{_UPLOAD_DIR_SEP}{session_id}_speaker2_audio.part"
+        },
+        hash_fields=['pdf_file']
+    )
 
     # 提取 API Key
-    user_api_key = request.form.get('api_key', '').strip()
+    user_api_key = form['api_key'].strip()
     if not user_api_key:
+        discard_uploads(files)
+
         def error_gen():
-            yield "data: " + json.dumps({
+            yield encode_event({
                 "type": "error",
                 "message": "未提供 API Key"
-            }) + "\n\n"
+            })
         return Response(error_gen(), mimetype='text/event-stream')
 
     # 提取表单数据
-    text_input = request.form.get('text_input', '').strip()
-    url_input = request.form.get('url', '').strip()
+    text_input = form['text_input'].strip()
+    # 只去掉 fragment，抓取用户输入的原始网址（规范化形式仅用作缓存键）
+    url_input = urldefrag(form['url'].strip()).url
 
     # 提取 PDF 文件
     pdf_file = None
     pdf_path = None
-    if 'pdf_file' in request.files:
-        pdf_file_obj = request.files['pdf_file']
-        if pdf_file_obj and allowed_file(pdf_file_obj.filename, ALLOWED_PDF_EXTENSIONS):
-            filename = secure_filename(pdf_file_obj.filename)
-            pdf_path = os.path.join(UPLOAD_DIR, f"{session_id}_{filename}")
-            pdf_file_obj.save(pdf_path)
+    pdf_digest = None
+    if 'pdf_file' in files:
+        tmp_path, original_name, pdf_digest = files.pop('pdf_file')
+        if allowed_file(original_name, _PDF_SUFFIXES):
+            filename = _safe_name(original_name)
+            pdf_path = f"{_UPLOAD_DIR_SEP}{session_id}_{filename}"
+            os.replace(tmp_path, pdf_path)
             pdf_file = filename
 
     # 提取音色配置
-    speaker1_type = request.form.get('speaker1_type', 'default')
-    speaker1_voice_name = request.form.get('speaker1_voice_name', 'mini')
+    speaker1_type = form['speaker1_type'] or 'default'
+    speaker1_voice_name = form['speaker1_voice_name'] or 'mini'
     speaker1_audio_path = None
-    if speaker1_type == 'custom' and 'speaker1_audio' in request.files:
-        audio_file = request.files['speaker1_audio']
-        if audio_file and allowed_file(audio_file.filename, ALLOWED_AUDIO_EXTENSIONS):
-            filename = secure_filename(audio_file.filename)
-            speaker1_audio_path = os.path.join(UPLOAD_DIR, f"{session_id}_speaker1_{filename}")
-            audio_file.save(speaker1_audio_path)
-
-    speaker2_type = request.form.get('speaker2_type', 'default')
-    speaker2_voice_name = request.form.get('speaker2_voice_name', 'max')
+    if speaker1_type == 'custom' and 'speaker1_audio' in files:
+        tmp_path, original_name, _ = files.pop('speaker1_audio')
+        if allowed_file(original_name, _AUDIO_SUFFIXES):
+            filename = _safe_name(original_name)
+            speaker1_audio_path = f"{_UPLOAD_DIR_SEP}{session_id}_speaker1_{filename}"
+            os.replace(tmp_path, speaker1_audio_path)
+
+    speaker2_type = form['speaker2_type'] or 'default'
+    speaker2_voice_name = form['speaker2_voice_name'] or 'max'
     speaker2_audio_path = None
-    if speaker2_type == 'custom' and 'speaker2_audio' in request.files:
-        audio_file = request.files['speaker2_audio']
-        if audio_file and allowed_file(audio_file.filename, ALLOWED_AUDIO_EXTENSIONS):
-            filename = secure_filename(audio_file.filename)
-            speaker2_audio_path = os.path.join(UPLOAD_DIR, f"{session_id}_speaker2_{filename}")
-            audio_file.save(speaker2_audio_path)
+    if speaker2_type == 'custom' and 'speaker2_audio' in files:
+        tmp_path, original_name, _ = files.pop('speaker2_audio')
+        if allowed_file(original_name, _AUDIO_SUFFIXES):
+            filename = _safe_name(original_name)
+            speaker2_audio_path = f"{_UPLOAD_DIR_SEP}{session_id}_speaker2_{filename}"
+            os.replace(tmp_path, speaker2_audio_path)
+
+    # 清理未使用或类型不符的上传文件
+    discard_uploads(files)
 
     def generate():
         """SSE 生成器"""
+        # 立即发送注释帧，尽早把响应头推送给客户端
+        yield SSE_PREAMBLE
+        batcher = SSEBatcher()
         try:
             # Step 1: 解析输入内容
-            yield f"data: {json.dumps({'type': 'progress', 'step': 'parsing_content', 'message': '正在解析输入内容...'})}\n\n"
+            yield from batcher.add_progress('parsing_content', '正在解析输入内容...')
 
-            # 处理 PDF 文件
-            pdf_content = ""
+            # PDF 解析和网址抓取提交到线程池并发执行，日志通过队列实时转发
+            log_queue = Queue()
+            futures = {}
             if pdf_path:
-                yield f"data: {json.dumps({'type': 'log', 'message': f'已上传 PDF: {pdf_file}'})}\n\n"
-
-                pdf_result = content_parser.parse_pdf(pdf_path)
+                yield from batcher.add_log(f'已上传 PDF: {pdf_file}')
+                futures['pdf'] = _IO_POOL.submit(content_parser.parse_pdf_cached, pdf_path, digest=pdf_digest,
+                                                 log_callback=log_queue.put)
+            if url_input:
+                yield from batcher.add_log(f'开始解析网址: {url_input}')
+                futures['url'] = _IO_POOL.submit(content_parser.parse_url_cached, url_input,
+                                                 log_callback=log_queue.put)
+
+            pdf_future = futures.get('pdf')
+            pending = list(futures.values())
+            while pending or not log_queue.empty():
+                # 先确认 PDF 已结束再读队列：队列读空时 PDF 的日志必已全部转发
+                pdf_failed = pdf_future is not None and pdf_future.done() and not pdf_future.result()["success"]
+                try:
+                    yield from batcher.add_log(log_queue.get(timeout=0.1))
+                except Empty:
+                    if pdf_failed:
+                        # PDF 解析失败时直接报错，不再等待网址抓取
+                        if 'url' in futures:
+                            futures['url'].cancel()
+                        break
+                    yield from batcher.flush()
+                pending = [future for future in pending if not future.done()]
+
+            # 处理 PDF 解析结果
+            pdf_content = ""
+            if 'pdf' in futures:
+                pdf_result = futures['pdf'].result()
                 if pdf_result["success"]:
                     pdf_content = pdf_result["content"]
-                    for log in pdf_result["logs"]:
-                        yield f"data: {json.dumps({'type': 'log', 'message': log})}\n\n"
                 else:
-                    yield f"data: {json.dumps({'type': 'error', 'message': pdf_result['error']})}\n\n"
+                    yield from batcher.add({'type': 'error', 'message': pdf_result['error']})
                     return
 
-            # 解析网址（如果提供）
+            # 处理网址解析结果
             url_content = ""
-            if url_input:
-                yield f"data: {json.dumps({'type': 'log', 'message': f'开始解析网址: {url_input}'})}\n\n"
-
-                url_result = content_parser.parse_url(url_input)
+            if 'url' in futures:
+                url_result = futures['url'].result()
                 if url_result["success"]:
                     url_content = url_result["content"]
-                    for log in url_result["logs"]:
-                        yield f"data: {json.dumps({'type': 'log', 'message': log})}\n\n"
                 else:
                     # 发送友好的错误提示，但不中断流程
                     error_code = url_result.get('error_code', 'unknown')
-                    yield f"data: {json.dumps({'type': 'url_parse_warning', 'message': url_result['error'], 'error_code': error_code})}\n\n"
-                    for log in url_result["logs"]:
-                        yield f"data: {json.dumps({'type': 'log', 'message': log})}\n\n"
+                    yield from batcher.add({'type': 'url_parse_warning', 'message': url_result['error'], 'error_code': error_code})
                     # 不返回，继续处理其他输入内容
 
             # 合并所有内容
             merged_content = content_parser.merge_contents(text_input, url_content, pdf_content)
 
             if not merged_content or merged_content == "没有可用的内容":
-                yield f"data: {json.dumps({'type': 'error', 'message': '请至少提供一种输入内容（文本/网址/PDF）'})}\n\n"
+                yield from batcher.add({'type': 'error', 'message': '请至少提供一种输入内容（文本/网址/PDF）'})
                 return
 
-            yield f"data: {json.dumps({'type': 'log', 'message': f'内容解析完成，共 {len(merged_content)} 字符'})}\n\n"
+            yield from batcher.add_log(f'内容解析完成，共 {len(merged_content)} 字符')
 
             # Step 2: 准备音色
-            yield f"data: {json.dumps({'type': 'progress', 'step': 'preparing_voices', 'message': '正在准备音色...'})}\n\n"
+            yield from batcher.add_progress('preparing_voices', '正在准备音色...')
 
             # Speaker1 配置
             speaker1_config = {"type": speaker1_type}
@@ -182,9 +386,9 @@ def generate_podcast():
             elif speaker1_type == 'custom':
                 if speaker1_audio_path:
                     speaker1_config["audio_file"] = speaker1_audio_path
-                    yield f"data: {json.dumps({'type': 'log', 'message': 'Speaker1 音频已上传'})}\n\n"
+                    yield from batcher.add_log('Speaker1 音频已上传')
                 else:
-                    yield f"data: {json.dumps({'type': 'error', 'message': 'Speaker1 选择自定义音色但未上传音频文件'})}\n\n"
+                    yield from batcher.add({'type': 'error', 'message': 'Speaker1 选择自定义音色但未上传音频文件'})
                     return
 
             # Speaker2 配置
@@ -195,26 +399,29 @@ def generate_podcast():
             elif speaker2_type == 'custom':
                 if speaker2_audio_path:
                     speaker2_config["audio_file"] = speaker2_audio_path
-                    yield f"data: {json.dumps({'type': 'log', 'message': 'Speaker2 音频已上传'})}\n\n"
+                    yield from batcher.add_log('Speaker2 音频已上传')
                 else:
-                    yield f"data: {json.dumps({'type': 'error', 'message': 'Speaker2 选择自定义音色但未上传音频文件'})}\n\n"
+                    yield from batcher.add({'type': 'error', 'message': 'Speaker2 选择自定义音色但未上传音频文件'})
                     return
 
-            # 准备音色（可能涉及克隆）
-            voices_result = voice_manager.prepare_voices(speaker1_config, speaker2_config, api_key=user_api_key)
+            # 准备音色（可能涉及克隆，在独立线程池中执行）
+            yield from batcher.flush()
+            voices_result = yield from wait_with_heartbeat(_VOICE_POOL.submit(
+                voice_manager.prepare_voices, speaker1_config, speaker2_config, api_key=user_api_key
+            ))
 
             if not voices_result["success"]:
-                yield f"data: {json.dumps({'type': 'error', 'message': voices_result['error']})}\n\n"
+                yield from batcher.add({'type': 'error', 'message': voices_result['error']})
                 return
 
             # 发送音色准备日志
             for log in voices_result["logs"]:
-                yield f"data: {json.dumps({'type': 'log', 'message': log})}\n\n"
+                yield from batcher.add_log(log)
 
             # 发送音色克隆的 Trace ID
             for key, trace_id in voices_result.get("trace_ids", {}).items():
                 if trace_id:
-                    yield f"data: {json.dumps({'type': 'trace_id', 'api': key, 'trace_id': trace_id})}\n\n"
+                    yield from batcher.add({'type': 'trace_id', 'api': key, 'trace_id': trace_id})
 
             speaker1_voice_id = voices_result["speaker1"]
             speaker2_voice_id = voices_result["speaker2"]
@@ -227,11 +434,13 @@ def generate_podcast():
                 session_id=session_id,
                 api_key=user_api_key
             ):
-                yield f"data: {json.dumps(event)}\n\n"
+                yield from batcher.add(event)
+
+            yield from batcher.flush()
 
         except Exception as e:
-            logger.error(f"播客生成失败: {str(e)}", exc_info=True)
-            yield f"data: {json.dumps({'type': 'error', 'message': f'播客生成失败: {str(e)}'})}\n\n"
+            logger.error("播客生成失败: %s", e, exc_info=True)
+            yield from batcher.add({'type': 'error', 'message': f'播客生成失败: {str(e)}'})
 
     return Response(generate(), mimetype='text/event-stream')
 
@@ -243,21 +452,19 @@ def upload_audio():
     上传音频文件接口（用于录音功能）
     """
     try:
-        if 'audio' not in request.files:
-            return jsonify({"success": False, "error": "未提供音频文件"})
+        tmp_path = f"{_UPLOAD_DIR_SEP}{uuid.uuid4()}_audio.part"
+        form, files = parse_upload_form(['session_id', 'speaker'], {'audio': tmp_path})
 
-        audio_file = request.files['audio']
-        if not audio_file:
-            return jsonify({"success": False, "error": "音频文件为空"})
+        if 'audio' not in files:
+            return jsonify({"success": False, "error": "未提供音频文件"})
 
         # 生成文件名
-        import time
-        session_id = request.form.get('session_id', str(uuid.uuid4()))
-        speaker = request.form.get('speaker', 'unknown')
+        session_id = form['session_id'] or str(uuid.uuid4())
+        speaker = form['speaker'] or 'unknown'
         filename = f"{session_id}_{speaker}_{int(time.time())}.wav"
-        file_path = os.path.join(UPLOAD_DIR, filename)
+        file_path = f"{_UPLOAD_DIR_SEP}{filename}"
 
-        audio_file.save(file_path)
+        os.replace(tmp_path, file_path)
 
         return jsonify({
             "success": True,
@@ -265,8 +472,10 @@ def upload_audio():
             "filename": filename
         })
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"音频上传失败: {str(e)}")
+        logger.error("音频上传失败: %s", e)
         return jsonify({"success": False, "error": str(e)})
 
 
@@ -286,13 +495,12 @@ def clone_voice():
         if not filepath or not os.path.exists(filepath):
             return jsonify({"success": False, "error": "音频文件不存在"})
 
-        logger.info(f"开始克隆音色: {filepath}, speaker: {speaker}")
+        logger.info("开始克隆音色: %s, speaker: %s", filepath, speaker)
 
         # 调用 voice_manager 来克隆音色
         user_api_key = data.get('api_key', '')
         if not user_api_key:
             # 从配置获取 API key
-            from config import MINIMAX_API_KEY
             user_api_key = MINIMAX_API_KEY
 
         # 创建临时配置
@@ -317,7 +525,7 @@ def clone_voice():
         })
 
     except Exception as e:
-        logger.error(f"音色克隆失败: {str(e)}", exc_info=True)
+        logger.error("音色克隆失败: %s", e, exc_info=True)
         return jsonify({"success": False, "error": str(e)})
 
 
@@ -330,10 +538,12 @@ def parse_content():
         # 获取请求数据
         data = request.get_json() if request.is_json else {}
         text_input = data.get('text_input', '')
-        url_input = data.get('url_input', '')
-        pdf_file = request.files.get('file')
+        url_input = (data.get('url_input') or '').strip()
+        url_input = urldefrag(url_input).url
+        _, files = parse_upload_form([], {'file': f"{_UPLOAD_DIR_SEP}{uuid.uuid4()}_file.part"}, hash_fields=['file'])
+        pdf_file = files.get('file')
 
-        logger.info(f"收到内容解析请求: text={len(text_input)}, url={url_input}, pdf={pdf_file is not None}")
+        logger.info("收到内容解析请求: text=%d, url=%s, pdf=%s", len(text_input), url_input, pdf_file is not None)
 
         # 解析文本
         text_content = text_input
@@ -341,7 +551,7 @@ def parse_content():
         # 解析网址
         url_content = ""
         if url_input:
-            url_result = content_parser.parse_url(url_input)
+            url_result = content_parser.parse_url_cached(url_input)
             if url_result["success"]:
                 url_content = url_result["content"]
             else:
@@ -353,13 +563,13 @@ def parse_content():
         # 解析PDF
         pdf_content = ""
         if pdf_file:
-            # 保存临时文件
-            import time
-            filename = secure_filename(pdf_file.filename)
-            pdf_path = os.path.join(UPLOAD_DIR, f"{int(time.time())}_{filename}")
-            pdf_file.save(pdf_path)
+            # 重命名临时文件
+            tmp_path, original_name, pdf_digest = pdf_file
+            filename = _safe_name(original_name)
+            pdf_path = f"{_UPLOAD_DIR_SEP}{int(time.time())}_{filename}"
+            os.replace(tmp_path, pdf_path)
 
-            pdf_result = content_parser.parse_pdf(pdf_path)
+            pdf_result = content_parser.parse_pdf_cached(pdf_path, digest=pdf_digest)
             if pdf_result["success"]:
                 pdf_content = pdf_result["content"]
             else:
@@ -383,8 +593,10 @@ def parse_content():
             "message": f"内容解析完成，共 {len(merged_content)} 字符"
         })
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"内容解析失败: {str(e)}", exc_info=True)
+        logger.error("内容解析失败: %s", e, exc_info=True)
         return jsonify({
             "success": False,
             "error": f"服务器错误: {str(e)}"
@@ -395,9 +607,9 @@ def parse_content():
 def download_audio(filename):
     """下载音频文件"""
     try:
-        return send_from_directory(OUTPUT_DIR, filename, as_attachment=True)
+        return send_output_file(filename)
     except Exception as e:
-        logger.error(f"下载音频失败: {str(e)}")
+        logger.error("下载音频失败: %s", e)
         return jsonify({"error": str(e)}), 404
 
 
@@ -405,9 +617,9 @@ def download_audio(filename):
 def download_script(filename):
     """下载脚本文件"""
     try:
-        return send_from_directory(OUTPUT_DIR, filename, as_attachment=True)
+        return send_output_file(filename)
     except Exception as e:
-        logger.error(f"下载脚本失败: {str(e)}")
+        logger.error("下载脚本失败: %s", e)
         return jsonify({"error": str(e)}), 404
 
 
@@ -415,28 +627,49 @@ def download_script(filename):
 def download_cover():
     """下载封面图片（从OSS代理下载）"""
     try:
-        import requests
         cover_url = request.args.get('url')
         if not cover_url:
             return jsonify({"error": "未提供封面URL"}), 400
 
-        # 从 OSS 获取图片
-        response = requests.get(cover_url, timeout=30)
-        response.raise_for_status()
+        # 从 OSS 获取图片（复用连接池，流式转发；透传条件请求头，上游未修改时直接返回 304）
+        conditional_headers = {name: request.headers[name] for name in _COVER_CONDITIONAL_HEADERS if name in request.headers}
+        response = _OSS_SESSION.get(cover_url, timeout=30, stream=True, headers=conditional_headers)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+
+        if response.status_code == 304:
+            response.close()
+            resp = Response(status=304)
+            for name in _COVER_VALIDATOR_HEADERS:
+                if name in response.headers:
+                    resp.headers[name] = response.headers[name]
+            return resp
 
         # 生成文件名
-        import time
         filename = f"podcast_cover_{int(time.time())}.jpg"
 
+        def stream_cover():
+            try:
+                yield from response.iter_content(65536)
+            finally:
+                response.close()
+
         # 返回图片数据，设置下载头
-        from flask import make_response
-        resp = make_response(response.content)
+        resp = Response(stream_cover(), direct_passthrough=True)
         resp.headers['Content-Type'] = 'image/jpeg'
         resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if 'Content-Length' in response.headers and 'Content-Encoding' not in response.headers:
+            resp.headers['Content-Length'] = response.headers['Content-Length']
+        for name in _COVER_VALIDATOR_HEADERS:
+            if name in response.headers:
+                resp.headers[name] = response.headers[name]
         return resp
 
     except Exception as e:
-        logger.error(f"下载封面失败: {str(e)}")
+        logger.error("下载封面失败: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -444,11 +677,10 @@ def download_cover():
 def serve_static(filename):
     """提供静态文件（BGM等）"""
     # 简化 BGM 访问
-    if filename == 'bgm01.wav':
-        return send_file(BGM_FILES["bgm01"])
-    elif filename == 'bgm02.wav':
-        return send_file(BGM_FILES["bgm02"])
-    return jsonify({"error": "File not found"}), 404
+    bgm_path = _BGM_MAP.get(filename)
+    if bgm_path is None:
+        return jsonify({"error": "File not found"}), 404
+    return send_file(bgm_path, conditional=True, max_age=BGM_MAX_AGE)
 
 
 if __name__ == '__main__':
@@ -457,5 +689,6 @@ if __name__ == '__main__':
     logger.info(f"📁 上传目录: {UPLOAD_DIR}")
     logger.info(f"📁 输出目录: {OUTPUT_DIR}")
     logger.info("=" * 50)
-    # 生产环境关闭 debug 模式，避免自动重启导致 SSE 连接中断
+    # 本地开发使用 Werkzeug 开发服务器；生产环境请通过 wsgi.py 使用 gunicorn + gevent
+    # 关闭 debug 模式，避免自动重启导致 SSE 连接中断
     app.run(debug=False, host='0.0.0.0', port=5001, threaded=True)
@@ -87,6 +87,27 @@ OUTPUT_DIR = os.path.join(BASE_DIR, "backend", "outputs")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# ========== 上传限制配置 ==========
+UPLOAD_LIMITS = {
+    "max_content_length": 64 * 1024 * 1024,  # 单个请求体上限（超出直接返回 413）
+    "max_file_size": 50 * 1024 * 1024  # 单个上传文件上限
+}
+
+# ========== 文件下载配置 ==========
+# 部署在 Nginx 之后时，设置 X_ACCEL_REDIRECT_PREFIX（如 "/protected/"）由 Nginx 直接发送输出文件；
+# 设置 USE_X_SENDFILE=1 则改用 X-Sendfile 头（Apache / lighttpd）
+DOWNLOAD_CONFIG = {
+    "x_accel_redirect_prefix": os.environ.get("X_ACCEL_REDIRECT_PREFIX", ""),
+    "use_x_sendfile": os.environ.get("USE_X_SENDFILE") == "1"
+}
+
+# ========== 内容解析缓存配置 ==========
+PARSE_CACHE_CONFIG = {
+    "path": os.path.join(UPLOAD_DIR, "parse_cache.json"),
+    "max_entries": 256,  # PDF / 网址缓存各自的最大条目数
+    "url_ttl": 3600  # 网址解析结果有效期（秒）
+}
+
 # ========== Voice ID 生成配置 ==========
 VOICE_ID_CONFIG = {
     "prefix": "customVoice",
@@ -3,32 +3,243 @@
 支持网页解析（BeautifulSoup）和 PDF 解析（PyPDF2）
 """
 
+import os
+import json
+import time
+import hashlib
 import logging
+import functools
+import threading
 import requests
+from io import BytesIO
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from bs4 import BeautifulSoup
-from PyPDF2 import PdfReader
-from typing import Dict, Any
-from config import TIMEOUTS
+from PyPDF2 import PdfReader, PdfWriter
+from typing import Dict, Any, Callable, Optional
+from config import TIMEOUTS, PARSE_CACHE_CONFIG
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def file_sha256(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """按块计算文件的 SHA-256 摘要"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_split_url = functools.lru_cache(maxsize=4096)(urlsplit)
+
+
+@functools.lru_cache(maxsize=4096)
+def canonicalize_url(url: str) -> str:
+    """规范化网址：去掉 fragment，主机名转小写（用户信息和端口保持原样），去掉路径末尾的斜杠"""
+    parts = _split_url(url)
+    userinfo, at, hostport = parts.netloc.rpartition('@')
+    netloc = f"{userinfo}{at}{hostport.lower()}"
+    return urlunsplit((parts.scheme, netloc, parts.path.rstrip('/'), parts.query, ''))
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_url(url: str) -> str:
+    """在 canonicalize_url 基础上对查询参数排序，作为缓存键"""
+    parts = _split_url(canonicalize_url(url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+
+# 解析开始时的日志前缀，后面跟着本次请求的文件路径或网址，不能写入缓存
+PDF_START_LOG = "开始解析 PDF: "
+URL_START_LOG = "开始解析网址: "
+
+
 class ContentParser:
     """内容解析器"""
 
-    def parse_url(self, url: str) -> Dict[str, Any]:
+    # 缓存写盘的合并延迟（秒），期间的多次写入只落盘一次
+    CACHE_SAVE_DELAY = 1.0
+
+    def __init__(self):
+        self.cache_config = PARSE_CACHE_CONFIG
+        self._cache_lock = threading.Lock()
+        self._save_pending = False
+        self._pdf_cache = {}  # SHA-256 -> 解析结果
+        self._url_cache = {}  # 规范化网址 -> [缓存时间, 解析结果]
+        self._load_cache()
+
+    def _read_cache_file(self) -> Dict[str, Any]:
+        """读取磁盘上的解析缓存文件，不存在时返回空缓存"""
+        try:
+            with open(self.cache_config["path"], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _load_cache(self):
+        """从磁盘加载解析缓存"""
+        try:
+            data = self._read_cache_file()
+            self._pdf_cache = data.get("pdf", {})
+            self._url_cache = data.get("url", {})
+            logger.info(f"已加载解析缓存: PDF {len(self._pdf_cache)} 条, 网址 {len(self._url_cache)} 条")
+        except Exception as e:
+            logger.warning(f"加载解析缓存失败: {str(e)}")
+
+    def _merge_entries(self, on_disk: Dict[str, Any], in_memory: Dict[str, Any]) -> Dict[str, Any]:
+        """合并磁盘与内存中的缓存条目（内存优先），超出上限时淘汰最早的条目"""
+        merged = {key: value for key, value in on_disk.items() if key not in in_memory}
+        merged.update(in_memory)
+        while len(merged) > self.cache_config["max_entries"]:
+            merged.pop(next(iter(merged)))
+        return merged
+
+    def _schedule_save(self):
+        """在后台线程中延迟写盘，多次写入合并为一次"""
+        with self._cache_lock:
+            if self._save_pending:
+                return
+            self._save_pending = True
+
+        timer = threading.Timer(self.CACHE_SAVE_DELAY, self._save_cache)
+        timer.daemon = True
+        timer.start()
+
+    def _save_cache(self):
+        """
+        将解析缓存写入磁盘
+
+        只在锁内复制快照，序列化和写文件都在锁外完成；写入前合并其他进程已落盘的条目，
+        临时文件名带进程号，避免多个 gunicorn worker 同时写同一个临时文件
+        """
+        with self._cache_lock:
+            self._save_pending = False
+            pdf_snapshot = dict(self._pdf_cache)
+            url_snapshot = dict(self._url_cache)
+
+        path = self.cache_config["path"]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            try:
+                on_disk = self._read_cache_file()
+            except Exception as e:
+                logger.warning(f"读取已有解析缓存失败，将覆盖写入: {str(e)}")
+                on_disk = {}
+
+            data = {
+                "pdf": self._merge_entries(on_disk.get("pdf", {}), pdf_snapshot),
+                "url": self._merge_entries(on_disk.get("url", {}), url_snapshot)
+            }
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"保存解析缓存失败: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _store(self, cache: Dict[str, Any], key: str, value: Any):
+        """写入缓存条目，超出上限时淘汰最早的条目，并安排后台写盘"""
+        with self._cache_lock:
+            cache.pop(key, None)
+            cache[key] = value
+            while len(cache) > self.cache_config["max_entries"]:
+                cache.pop(next(iter(cache)))
+        self._schedule_save()
+
+    def _make_logger(self, logs: list, log_callback: Optional[Callable[[str], None]]) -> Callable[[str], None]:
+        """返回一个记录日志的函数：追加到 logs，并同步调用回调"""
+        def log(message: str):
+            logs.append(message)
+            if log_callback:
+                log_callback(message)
+        return log
+
+    @staticmethod
+    def _cacheable(result: Dict[str, Any]) -> Dict[str, Any]:
+        """去掉带有上传路径或网址的日志，避免命中缓存时把首个请求者的信息回放给其他用户"""
+        logs = [m for m in result["logs"] if not m.startswith((PDF_START_LOG, URL_START_LOG))]
+        return dict(result, logs=logs)
+
+    def _cache_hit(self, cached: Dict[str, Any], start_message: str, hit_message: str,
+                   log_callback: Optional[Callable[[str], None]]) -> Dict[str, Any]:
+        """复制缓存结果，用本次请求的开始日志替换缓存中的开始日志，并追加命中日志"""
+        logs = []
+        log = self._make_logger(logs, log_callback)
+        log(start_message)
+        for message in self._cacheable(cached)["logs"]:
+            log(message)
+        log(hit_message)
+        return dict(cached, logs=logs)
+
+    def parse_pdf_cached(self, pdf_path: str, digest: str = None,
+                         log_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        解析 PDF 文件，相同内容的文件直接返回缓存结果
+
+        Args:
+            pdf_path: PDF 文件路径
+            digest: 文件的 SHA-256 摘要（未提供时读取文件计算）
+            log_callback: 日志回调，每产生一条日志立即调用（用于实时推送）
+
+        Returns:
+            包含解析文本和日志的字典
+        """
+        if digest is None:
+            digest = file_sha256(pdf_path)
+
+        with self._cache_lock:
+            cached = self._pdf_cache.get(digest)
+        if cached:
+            return self._cache_hit(cached, f"{PDF_START_LOG}{pdf_path}", "命中 PDF 解析缓存", log_callback)
+
+        result = self.parse_pdf(pdf_path, log_callback=log_callback)
+        if result["success"]:
+            self._store(self._pdf_cache, digest, self._cacheable(result))
+        return result
+
+    def parse_url_cached(self, url: str,
+                         log_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        解析网页内容，有效期内的相同网址直接返回缓存结果
+
+        Args:
+            url: 网页 URL
+            log_callback: 日志回调，每产生一条日志立即调用（用于实时推送）
+
+        Returns:
+            包含解析文本和日志的字典
+        """
+        key = normalize_url(url)
+
+        with self._cache_lock:
+            entry = self._url_cache.get(key)
+        if entry and time.time() - entry[0] < self.cache_config["url_ttl"]:
+            return self._cache_hit(entry[1], f"{URL_START_LOG}{url}", "命中网址解析缓存", log_callback)
+
+        result = self.parse_url(url, log_callback=log_callback)
+        if result["success"]:
+            self._store(self._url_cache, key, [time.time(), self._cacheable(result)])
+        return result
+
+    def parse_url(self, url: str, log_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         解析网页内容
 
         Args:
             url: 网页 URL
+            log_callback: 日志回调，每产生一条日志立即调用（用于实时推送）
 
         Returns:
             包含解析文本和日志的字典
         """
         logs = []
-        logs.append(f"开始解析网址: {url}")
+        log = self._make_logger(logs, log_callback)
+        log(f"{URL_START_LOG}{url}")
 
         try:
             # 发送 HTTP 请求，使用更真实的浏览器请求头
@@ -56,7 +267,7 @@ class ContentParser:
             response.raise_for_status()
             response.encoding = response.apparent_encoding
 
-            logs.append(f"成功获取网页内容，状态码: {response.status_code}")
+            log(f"成功获取网页内容，状态码: {response.status_code}")
 
             # 使用 BeautifulSoup 解析 HTML
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -76,9 +287,9 @@ class ContentParser:
             max_length = 10000
             if len(content) > max_length:
                 content = content[:max_length] + "\n...(内容过长，已截断)"
-                logs.append(f"内容过长，已截断至 {max_length} 字符")
+                log(f"内容过长，已截断至 {max_length} 字符")
 
-            logs.append(f"成功提取文本，共 {len(content)} 字符")
+            log(f"成功提取文本，共 {len(content)} 字符")
 
             return {
                 "success": True,
@@ -90,7 +301,7 @@ class ContentParser:
 
         except requests.Timeout:
             error_msg = f"网页解析超时（{TIMEOUTS['url_parsing']}秒）"
-            logs.append(f"错误: {error_msg}")
+            log(f"错误: {error_msg}")
             logger.error(error_msg)
             return {
                 "success": False,
@@ -103,11 +314,11 @@ class ContentParser:
             # 检查是否是 403 Forbidden 错误
             if "403" in str(e) or "Forbidden" in str(e):
                 error_msg = f"该网站拒绝了访问请求（403 Forbidden）。这通常是因为网站的反爬虫策略限制了服务器访问。\n\n💡 建议：请复制网页文本内容，直接粘贴到「话题文本」输入框中。"
-                logs.append(f"访问被拒绝: {url}")
+                log(f"访问被拒绝: {url}")
                 logger.warning(f"403 Forbidden: {url}")
             else:
                 error_msg = f"网页请求失败: {str(e)}"
-                logs.append(f"错误: {error_msg}")
+                log(f"错误: {error_msg}")
                 logger.error(error_msg)
 
             return {
@@ -120,7 +331,7 @@ class ContentParser:
 
         except Exception as e:
             error_msg = f"网页解析失败: {str(e)}"
-            logs.append(f"错误: {error_msg}")
+            log(f"错误: {error_msg}")
             logger.error(error_msg)
             return {
                 "success": False,
@@ -129,25 +340,27 @@ class ContentParser:
                 "source": "url"
             }
 
-    def parse_pdf(self, pdf_path: str) -> Dict[str, Any]:
+    def parse_pdf(self, pdf_path: str, log_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         解析 PDF 文件
 
         Args:
             pdf_path: PDF 文件路径
+            log_callback: 日志回调，每产生一条日志立即调用（用于实时推送）
 
         Returns:
             包含解析文本和日志的字典
         """
         logs = []
-        logs.append(f"开始解析 PDF: {pdf_path}")
+        log = self._make_logger(logs, log_callback)
+        log(f"{PDF_START_LOG}{pdf_path}")
 
         try:
             # 使用 PyPDF2 读取 PDF
             reader = PdfReader(pdf_path)
             num_pages = len(reader.pages)
 
-            logs.append(f"PDF 共 {num_pages} 页")
+            log(f"PDF 共 {num_pages} 页")
 
             # 提取所有页面的文本
             all_text = []
@@ -156,15 +369,15 @@ class ContentParser:
                     text = page.extract_text()
                     if text.strip():
                         all_text.append(text)
-                        logs.append(f"成功提取第 {i + 1} 页内容")
+                        log(f"成功提取第 {i + 1} 页内容")
                     else:
-                        logs.append(f"警告: 第 {i + 1} 页无法提取文本（可能是扫描版）")
+                        log(f"警告: 第 {i + 1} 页无法提取文本（可能是扫描版）")
                 except Exception as e:
-                    logs.append(f"警告: 第 {i + 1} 页提取失败: {str(e)}")
+                    log(f"警告: 第 {i + 1} 页提取失败: {str(e)}")
 
             if not all_text:
                 error_msg = "PDF 无法提取文本，可能是扫描版 PDF，不支持此格式"
-                logs.append(f"错误: {error_msg}")
+                log(f"错误: {error_msg}")
                 return {
                     "success": False,
                     "error": error_msg,
@@ -178,9 +391,9 @@ class ContentParser:
             max_length = 10000
             if len(content) > max_length:
                 content = content[:max_length] + "\n...(内容过长，已截断)"
-                logs.append(f"内容过长，已截断至 {max_length} 字符")
+                log(f"内容过长，已截断至 {max_length} 字符")
 
-            logs.append(f"成功提取文本，共 {len(content)} 字符")
+            log(f"成功提取文本，共 {len(content)} 字符")
 
             return {
                 "success": True,
@@ -192,7 +405,7 @@ class ContentParser:
 
         except Exception as e:
             error_msg = f"PDF 解析失败: {str(e)}"
-            logs.append(f"错误: {error_msg}")
+            log(f"错误: {error_msg}")
             logger.error(error_msg)
             return {
                 "success": False,
@@ -201,6 +414,24 @@ class ContentParser:
                 "source": "pdf"
             }
 
+    def warmup(self):
+        """
+        预热解析依赖：在内存中构造一页空白 PDF 和一段 HTML 走一遍解析流程，
+        让 PyPDF2 / BeautifulSoup 的延迟导入和初始化发生在启动阶段而不是首个请求中
+        """
+        writer = PdfWriter()
+        writer.add_blank_page(width=72, height=72)
+        buffer = BytesIO()
+        writer.write(buffer)
+        buffer.seek(0)
+        for page in PdfReader(buffer).pages:
+            page.extract_text()
+
+        soup = BeautifulSoup('<html><body><script></script><p>warmup</p></body></html>', 'html.parser')
+        for script in soup(['script', 'style', 'nav', 'footer', 'header']):
+            script.decompose()
+        soup.get_text(separator='\n', strip=True)
+
     def merge_contents(self, text_input: str = "", url_content: str = "", pdf_content: str = "") -> str:
         """
         合并多种来源的内容
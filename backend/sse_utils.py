@@ -0,0 +1,103 @@
+"""
+SSE 工具模块
+将高频的日志事件合并成一次写出，减少 WSGI 层的 flush 次数
+"""
+
+import time
+import orjson
+from typing import Dict, Any, List
+
+# 连接建立后立即发送的注释帧，用于尽早把响应头推送给客户端
+SSE_PREAMBLE = b":ok\n\n"
+
+# 长时间等待后台任务时定期发送的心跳注释帧，防止代理因空闲断开连接
+SSE_HEARTBEAT = b": keep-alive\n\n"
+
+
+# 高频事件的预制帧模板（字段顺序与 encode_event 的输出一致）
+_LOG_PREFIX = b'data: {"type":"log","message":'
+_PROGRESS_TEMPLATE = b'data: {"type":"progress","step":%b,"message":%b}\n\n'
+_TAIL = b'}\n\n'
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """将事件字典编码为一帧 SSE 数据（orjson 直接输出 UTF-8 字节）"""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+def encode_log(message: str) -> bytes:
+    """编码日志事件，等价于 encode_event({"type": "log", "message": message})"""
+    return _LOG_PREFIX + orjson.dumps(message) + _TAIL
+
+
+def encode_progress(step: str, message: str) -> bytes:
+    """编码进度事件，等价于 encode_event({"type": "progress", "step": step, "message": message})"""
+    return _PROGRESS_TEMPLATE % (orjson.dumps(step), orjson.dumps(message))
+
+
+class SSEBatcher:
+    """
+    SSE 事件批量发送器
+
+    日志事件先写入缓冲区，累计超过 FLUSH_BYTES 或距上次发送超过 FLUSH_INTERVAL 秒时一起发送；
+    其他类型的事件（进度、错误、Trace ID、脚本、音频等）会连同缓冲区立即发送，保证状态切换的实时性。
+
+    用法:
+        batcher = SSEBatcher()
+        yield from batcher.add_log("...")
+        yield from batcher.add({"type": "trace_id", ...})
+        yield from batcher.flush()
+    """
+
+    FLUSH_BYTES = 4096
+    FLUSH_INTERVAL = 0.05
+    BATCHED_TYPES = frozenset({'log'})
+
+    def __init__(self):
+        self._buffer: List[bytes] = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, event: Dict[str, Any]):
+        """
+        添加一个事件
+
+        Returns:
+            需要立即发送的数据块（可能为空）
+        """
+        return self._push(encode_event(event), event.get('type') in self.BATCHED_TYPES)
+
+    def add_log(self, message: str):
+        """添加一条日志事件（使用预制模板编码）"""
+        return self._push(encode_log(message), True)
+
+    def add_progress(self, step: str, message: str):
+        """添加一个进度事件（使用预制模板编码，立即发送）"""
+        return self._push(encode_progress(step, message), False)
+
+    def _push(self, frame: bytes, batched: bool):
+        """写入一帧数据，按需触发发送"""
+        self._buffer.append(frame)
+        self._size += len(frame)
+
+        if (not batched
+                or self._size >= self.FLUSH_BYTES
+                or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL):
+            return self.flush()
+        return ()
+
+    def flush(self):
+        """
+        立即发送缓冲区中的所有事件
+
+        Returns:
+            需要发送的数据块（缓冲区为空时为空）
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return ()
+
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._size = 0
+        return (data,)
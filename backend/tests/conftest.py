@@ -0,0 +1,56 @@
+"""
+后端单元测试公共配置
+
+运行方式（仓库根目录）: python -m pytest backend/tests
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_module():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def upload_dir(app_module, tmp_path, monkeypatch):
+    """将上传目录重定向到临时目录"""
+    monkeypatch.setattr(app_module, '_UPLOAD_DIR_SEP', str(tmp_path) + os.sep)
+    return tmp_path
+
+
+def multipart_body(fields=(), files=(), boundary='BOUND', closed=True):
+    """
+    构造 multipart/form-data 请求体
+
+    Args:
+        fields: (字段名, 值) 列表
+        files: (字段名, 文件名, 内容) 列表
+        closed: 是否写入结束边界（False 时模拟被截断的请求体）
+
+    Returns:
+        (请求体, Content-Type)
+    """
+    parts = []
+    for name, value in fields:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+                     + value.encode() + b'\r\n')
+    for name, filename, content in files:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    body = b''.join(parts)
+    if closed:
+        body += f'--{boundary}--\r\n'.encode()
+    else:
+        body = body[:-2]
+    return body, f'multipart/form-data; boundary={boundary}'
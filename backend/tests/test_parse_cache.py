@@ -0,0 +1,103 @@
+"""content_parser 解析缓存测试"""
+
+import os
+import json
+import pytest
+import content_parser
+from content_parser import ContentParser, PDF_START_LOG, URL_START_LOG
+
+
+@pytest.fixture
+def cache_config(tmp_path, monkeypatch):
+    config = {"path": str(tmp_path / "parse_cache.json"), "max_entries": 2, "url_ttl": 60}
+    monkeypatch.setattr(content_parser, 'PARSE_CACHE_CONFIG', config)
+    return config
+
+
+@pytest.fixture
+def parser(cache_config, monkeypatch):
+    """解析结果固定、记录调用次数的解析器，写盘改为同步以便检查"""
+    parser = ContentParser()
+    parser.calls = []
+
+    def fake_parse_pdf(pdf_path, log_callback=None):
+        parser.calls.append(pdf_path)
+        return {"success": True, "content": "pdf", "logs": [f"{PDF_START_LOG}{pdf_path}", "PDF 共 1 页"]}
+
+    def fake_parse_url(url, log_callback=None):
+        parser.calls.append(url)
+        return {"success": True, "content": "url", "logs": [f"{URL_START_LOG}{url}", "网页解析完成"]}
+
+    monkeypatch.setattr(parser, 'parse_pdf', fake_parse_pdf)
+    monkeypatch.setattr(parser, 'parse_url', fake_parse_url)
+    monkeypatch.setattr(parser, '_schedule_save', parser._save_cache)
+    return parser
+
+
+def test_pdf_cache_hit(parser):
+    first = parser.parse_pdf_cached('/uploads/user1_a.pdf', digest='d1')
+    logs = []
+    second = parser.parse_pdf_cached('/uploads/user2_a.pdf', digest='d1', log_callback=logs.append)
+
+    assert parser.calls == ['/uploads/user1_a.pdf']
+    assert second["content"] == first["content"]
+    assert second["logs"] == logs == [f"{PDF_START_LOG}/uploads/user2_a.pdf", "PDF 共 1 页", "命中 PDF 解析缓存"]
+    assert not any('user1' in message for message in second["logs"])
+
+
+def test_failed_parse_is_not_cached(parser, monkeypatch):
+    monkeypatch.setattr(parser, 'parse_pdf', lambda pdf_path, log_callback=None: (
+        parser.calls.append(pdf_path) or {"success": False, "error": "boom", "logs": []}))
+
+    parser.parse_pdf_cached('/a.pdf', digest='d1')
+    parser.parse_pdf_cached('/a.pdf', digest='d1')
+
+    assert parser.calls == ['/a.pdf', '/a.pdf']
+
+
+def test_url_cache_hit_uses_normalized_key(parser):
+    parser.parse_url_cached('https://Example.com/a/?b=2&a=1#top')
+    result = parser.parse_url_cached('https://example.com/a?a=1&b=2')
+
+    assert parser.calls == ['https://Example.com/a/?b=2&a=1#top']
+    assert result["logs"][0] == f"{URL_START_LOG}https://example.com/a?a=1&b=2"
+    assert result["logs"][-1] == "命中网址解析缓存"
+
+
+def test_url_cache_ttl(parser, cache_config, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(content_parser.time, 'time', lambda: now[0])
+
+    parser.parse_url_cached('https://example.com')
+    now[0] += cache_config["url_ttl"] - 1
+    parser.parse_url_cached('https://example.com')
+    now[0] += 1
+    parser.parse_url_cached('https://example.com')
+
+    assert len(parser.calls) == 2
+
+
+def test_eviction_drops_oldest(parser):
+    for digest in ('d1', 'd2', 'd1', 'd3'):
+        parser.parse_pdf_cached(f'/{digest}.pdf', digest=digest)
+
+    assert list(parser._pdf_cache) == ['d2', 'd3']
+    parser.parse_pdf_cached('/d1.pdf', digest='d1')
+    assert parser.calls == ['/d1.pdf', '/d2.pdf', '/d3.pdf', '/d1.pdf']
+
+
+def test_save_merges_entries_from_other_processes(parser, cache_config):
+    other = ContentParser()
+    other._pdf_cache['other'] = {"success": True, "content": "x", "logs": []}
+    other._save_cache()
+
+    parser.parse_pdf_cached('/a.pdf', digest='mine')
+
+    with open(cache_config["path"], encoding='utf-8') as f:
+        saved = json.load(f)
+    assert list(saved["pdf"]) == ['other', 'mine']
+    assert saved["pdf"]["mine"]["logs"] == ["PDF 共 1 页"]
+    assert os.listdir(os.path.dirname(cache_config["path"])) == ['parse_cache.json']
+
+    reloaded = ContentParser()
+    assert set(reloaded._pdf_cache) == {'other', 'mine'}
@@ -0,0 +1,56 @@
+"""sse_utils SSE 编码与批量发送测试"""
+
+import pytest
+import sse_utils
+from sse_utils import SSEBatcher, encode_event, encode_log, encode_progress
+
+MESSAGES = ['普通日志', 'quote " and \\ backslash', 'line\nbreak\ttab', '', 'emoji 🎙️  ']
+
+
+@pytest.mark.parametrize('message', MESSAGES)
+def test_encode_log_matches_encode_event(message):
+    assert encode_log(message) == encode_event({"type": "log", "message": message})
+
+
+@pytest.mark.parametrize('message', MESSAGES)
+def test_encode_progress_matches_encode_event(message):
+    step = 'parsing_content'
+    assert encode_progress(step, message) == encode_event({"type": "progress", "step": step, "message": message})
+
+
+def test_logs_are_batched_until_flush(monkeypatch):
+    monkeypatch.setattr(SSEBatcher, 'FLUSH_INTERVAL', 3600)
+    batcher = SSEBatcher()
+
+    assert tuple(batcher.add_log('a')) == ()
+    assert tuple(batcher.add({"type": "log", "message": "b"})) == ()
+    assert tuple(batcher.flush()) == (encode_log('a') + encode_log('b'),)
+    assert tuple(batcher.flush()) == ()
+
+
+def test_non_log_event_flushes_buffer(monkeypatch):
+    monkeypatch.setattr(SSEBatcher, 'FLUSH_INTERVAL', 3600)
+    batcher = SSEBatcher()
+    event = {"type": "trace_id", "api": "script", "trace_id": "t"}
+
+    batcher.add_log('a')
+    assert tuple(batcher.add(event)) == (encode_log('a') + encode_event(event),)
+    assert tuple(batcher.add_progress('step', 'msg')) == (encode_progress('step', 'msg'),)
+
+
+def test_flush_by_size(monkeypatch):
+    monkeypatch.setattr(SSEBatcher, 'FLUSH_INTERVAL', 3600)
+    batcher = SSEBatcher()
+    message = 'x' * SSEBatcher.FLUSH_BYTES
+
+    assert tuple(batcher.add_log(message)) == (encode_log(message),)
+
+
+def test_flush_by_interval(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(sse_utils.time, 'monotonic', lambda: now[0])
+    batcher = SSEBatcher()
+
+    assert tuple(batcher.add_log('a')) == ()
+    now[0] += SSEBatcher.FLUSH_INTERVAL * 2
+    assert tuple(batcher.add_log('b')) == (encode_log('a') + encode_log('b'),)
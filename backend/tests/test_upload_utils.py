@@ -0,0 +1,132 @@
+"""upload_utils 上传解析测试"""
+
+import os
+import hashlib
+import pytest
+import upload_utils
+from werkzeug.exceptions import BadRequest
+from tests.conftest import multipart_body
+
+
+@pytest.fixture(params=['buffered', 'streaming'])
+def parse_mode(request, monkeypatch):
+    """分别走 Werkzeug 缓冲解析和流式解析两条路径"""
+    monkeypatch.setattr(upload_utils, 'STREAM_THRESHOLD', 1 << 40 if request.param == 'buffered' else 0)
+    return request.param
+
+
+def parse(app_module, body, content_type, field_names, file_paths, hash_fields=()):
+    with app_module.app.test_request_context('/', method='POST', data=body, content_type=content_type):
+        return upload_utils.parse_upload_form(field_names, file_paths, hash_fields=hash_fields)
+
+
+def test_threshold_selects_parser(app_module, monkeypatch):
+    calls = []
+    monkeypatch.setattr(upload_utils, '_parse_buffered', lambda *args: calls.append('buffered') or ({}, {}))
+    monkeypatch.setattr(upload_utils, '_parse_streaming', lambda *args: calls.append('streaming') or ({}, {}))
+
+    small, content_type = multipart_body(files=[('f', 'a.bin', b'x' * 10)])
+    large, _ = multipart_body(files=[('f', 'a.bin', b'x' * upload_utils.STREAM_THRESHOLD)])
+    parse(app_module, small, content_type, [], {'f': '/unused'})
+    parse(app_module, large, content_type, [], {'f': '/unused'})
+
+    assert calls == ['buffered', 'streaming']
+
+
+def test_fields_files_and_digest(app_module, tmp_path, parse_mode):
+    content = os.urandom(4096)
+    body, content_type = multipart_body(
+        fields=[('session_id', 'abc'), ('speaker', '说话人')],
+        files=[('audio', 'rec.wav', content), ('pdf', 'doc.pdf', content)]
+    )
+    file_paths = {'audio': str(tmp_path / 'audio.part'), 'pdf': str(tmp_path / 'pdf.part')}
+
+    form, files = parse(app_module, body, content_type, ['session_id', 'speaker', 'missing'], file_paths,
+                        hash_fields=['pdf'])
+
+    assert form == {'session_id': 'abc', 'speaker': '说话人', 'missing': ''}
+    assert files['audio'] == (file_paths['audio'], 'rec.wav', None)
+    assert files['pdf'] == (file_paths['pdf'], 'doc.pdf', hashlib.sha256(content).hexdigest())
+    for path in file_paths.values():
+        with open(path, 'rb') as f:
+            assert f.read() == content
+
+
+def test_empty_filename_is_dropped(app_module, tmp_path, parse_mode):
+    body, content_type = multipart_body(files=[('audio', '', b'')])
+    path = tmp_path / 'audio.part'
+
+    _, files = parse(app_module, body, content_type, [], {'audio': str(path)})
+
+    assert files == {}
+    assert not path.exists()
+
+
+def test_non_multipart_request(app_module):
+    with app_module.app.test_request_context('/', method='POST', data={'url': 'https://example.com'}):
+        form, files = upload_utils.parse_upload_form(['url', 'api_key'], {'pdf': '/unused'})
+    assert form == {'url': 'https://example.com', 'api_key': ''}
+    assert files == {}
+
+
+def test_discard_uploads(tmp_path):
+    path = tmp_path / 'a.part'
+    path.write_bytes(b'x')
+    upload_utils.discard_uploads({'a': (str(path), 'a.wav', None), 'b': (str(tmp_path / 'gone'), 'b.wav', None)})
+    assert not path.exists()
+
+
+def test_truncated_body_is_rejected(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_utils, 'STREAM_THRESHOLD', 0)
+    body, content_type = multipart_body(files=[('audio', 'rec.wav', b'x' * 100000)], closed=False)
+    path = tmp_path / 'audio.part'
+
+    with pytest.raises(BadRequest):
+        parse(app_module, body, content_type, [], {'audio': str(path)})
+    assert not path.exists()
+
+
+def test_upload_audio_truncated(client, upload_dir):
+    body, content_type = multipart_body(files=[('audio', 'rec.wav', b'x' * (2 << 20))], closed=False)
+
+    resp = client.post('/api/upload-audio', data=body, content_type=content_type)
+
+    assert resp.status_code == 400
+    assert resp.get_json()['success'] is False
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_upload_audio_streaming(client, upload_dir):
+    content = os.urandom(2 << 20)
+    body, content_type = multipart_body(fields=[('session_id', 's1'), ('speaker', 'speaker1')],
+                                        files=[('audio', 'rec.wav', content)])
+
+    resp = client.post('/api/upload-audio', data=body, content_type=content_type)
+
+    data = resp.get_json()
+    assert resp.status_code == 200 and data['success']
+    assert data['filename'].startswith('s1_speaker1_')
+    assert [p.name for p in upload_dir.iterdir()] == [data['filename']]
+    with open(data['filepath'], 'rb') as f:
+        assert f.read() == content
+
+
+def test_oversized_file_returns_413(client, upload_dir, monkeypatch):
+    monkeypatch.setitem(upload_utils.UPLOAD_LIMITS, 'max_file_size', 1 << 20)
+    body, content_type = multipart_body(files=[('audio', 'rec.wav', b'x' * (2 << 20))])
+
+    resp = client.post('/api/upload-audio', data=body, content_type=content_type)
+
+    assert resp.status_code == 413
+    assert resp.get_json()['success'] is False
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_oversized_request_returns_413(client, app_module, upload_dir, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    body, content_type = multipart_body(files=[('audio', 'rec.wav', b'x' * 4096)])
+
+    resp = client.post('/api/upload-audio', data=body, content_type=content_type)
+
+    assert resp.status_code == 413
+    assert resp.get_json()['success'] is False
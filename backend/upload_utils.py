@@ -0,0 +1,182 @@
+"""
+上传处理模块
+使用 streaming-form-data 流式解析 multipart 请求体，文件分片直接写盘，
+绕过 Werkzeug formparser 对大文件的整体缓冲
+"""
+
+import os
+import hashlib
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+from flask import request
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.targets import FileTarget, ValueTarget
+from streaming_form_data.validators import MaxSizeValidator, ValidationError
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from config import UPLOAD_LIMITS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 请求体小于该大小时直接使用 Werkzeug 解析（开销可以忽略）
+STREAM_THRESHOLD = 1024 * 1024
+
+# 每次从 request.stream 读取的字节数
+STREAM_CHUNK_SIZE = 65536
+
+# 小请求保存文件时的复制缓冲区大小
+COPY_BUFFER_SIZE = 1 << 20
+
+# 上传文件信息: (临时保存路径, 客户端原始文件名, SHA-256 摘要或 None)
+UploadedFile = Tuple[str, str, Optional[str]]
+
+
+class UploadFileTarget(FileTarget):
+    """记录文件分片是否完整结束（解析器读到该分片的结束边界时才会调用 on_finish）"""
+
+    def __init__(self, filename: str, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self.finished = False
+
+    def on_finish(self):
+        super().on_finish()
+        self.finished = True
+
+
+class HashingFileTarget(UploadFileTarget):
+    """写盘的同时计算 SHA-256，避免落盘后再读一遍文件"""
+
+    def __init__(self, filename: str, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self._sha256 = hashlib.sha256()
+
+    def on_data_received(self, chunk: bytes):
+        super().on_data_received(chunk)
+        self._sha256.update(chunk)
+
+    @property
+    def digest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def parse_upload_form(field_names: Iterable[str],
+                      file_paths: Dict[str, str],
+                      hash_fields: Iterable[str] = ()) -> Tuple[Dict[str, str], Dict[str, UploadedFile]]:
+    """
+    解析 multipart 表单，文件写入指定的临时路径
+
+    Args:
+        field_names: 需要读取的文本字段名
+        file_paths: 文件字段名 -> 临时保存路径
+        hash_fields: 需要在写盘时同步计算 SHA-256 的文件字段名
+
+    Returns:
+        (文本字段字典, 文件字段名 -> (临时保存路径, 客户端原始文件名, SHA-256 摘要))
+        未上传或文件名为空的文件字段不会出现在结果中；未要求计算摘要的字段摘要为 None
+    """
+    if request.mimetype != 'multipart/form-data':
+        return {name: request.form.get(name, '') for name in field_names}, {}
+
+    hash_fields = frozenset(hash_fields)
+    content_length = request.content_length
+    if content_length is not None and content_length < STREAM_THRESHOLD:
+        return _parse_buffered(field_names, file_paths, hash_fields)
+
+    return _parse_streaming(field_names, file_paths, hash_fields)
+
+
+def discard_uploads(files: Dict[str, UploadedFile]):
+    """删除不再需要的临时上传文件"""
+    for path, _, _ in files.values():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _discard_targets(targets: Iterable[UploadFileTarget]):
+    """关闭并删除写了一半的文件"""
+    for target in targets:
+        target.on_finish()
+        if os.path.exists(target.filename):
+            os.remove(target.filename)
+
+
+def _parse_buffered(field_names: Iterable[str],
+                    file_paths: Dict[str, str],
+                    hash_fields: frozenset) -> Tuple[Dict[str, str], Dict[str, UploadedFile]]:
+    """小请求：沿用 request.form / request.files"""
+    form = {name: request.form.get(name, '') for name in field_names}
+
+    files = {}
+    for name, path in file_paths.items():
+        file_obj = request.files.get(name)
+        if file_obj and file_obj.filename:
+            sha256 = hashlib.sha256() if name in hash_fields else None
+            with open(path, 'wb') as f:
+                while True:
+                    chunk = file_obj.stream.read(COPY_BUFFER_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    if sha256:
+                        sha256.update(chunk)
+            files[name] = (path, file_obj.filename, sha256.hexdigest() if sha256 else None)
+
+    return form, files
+
+
+def _parse_streaming(field_names: Iterable[str],
+                     file_paths: Dict[str, str],
+                     hash_fields: frozenset) -> Tuple[Dict[str, str], Dict[str, UploadedFile]]:
+    """
+    大请求：边读边解析，文件分片直接写入磁盘
+
+    单个文件超过大小上限时中止并返回 413；请求体缺少结束边界（上传被截断）时返回 400
+    """
+    parser = StreamingFormDataParser(headers={'Content-Type': request.content_type})
+
+    value_targets = {}
+    for name in field_names:
+        value_targets[name] = ValueTarget()
+        parser.register(name, value_targets[name])
+
+    file_targets = {}
+    for name, path in file_paths.items():
+        target_class = HashingFileTarget if name in hash_fields else UploadFileTarget
+        file_targets[name] = target_class(path, validator=MaxSizeValidator(UPLOAD_LIMITS["max_file_size"]))
+        parser.register(name, file_targets[name])
+
+    stream = request.stream
+    try:
+        while True:
+            chunk = stream.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+    except Exception as e:
+        _discard_targets(file_targets.values())
+        if isinstance(e, ValidationError):
+            raise RequestEntityTooLarge(f"单个文件不能超过 {UPLOAD_LIMITS['max_file_size'] // (1024 * 1024)} MB") from e
+        raise
+
+    # 已开始写入但没有读到结束边界的文件是被截断的，不能当作完整上传
+    if any(os.path.exists(target.filename) and not target.finished for target in file_targets.values()):
+        _discard_targets(file_targets.values())
+        raise BadRequest("上传内容不完整，请重新上传")
+
+    form = {name: target.value.decode('utf-8', errors='replace') for name, target in value_targets.items()}
+
+    files = {}
+    for name, target in file_targets.items():
+        if not os.path.exists(target.filename):
+            continue
+        if not target.multipart_filename:
+            os.remove(target.filename)
+            continue
+        digest = target.digest if isinstance(target, HashingFileTarget) else None
+        files[name] = (target.filename, target.multipart_filename, digest)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("流式解析上传完成，文件字段: %s", list(files.keys()))
+    return form, files
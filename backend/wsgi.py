@@ -0,0 +1,16 @@
+"""
+WSGI 入口（生产环境）
+使用 gunicorn + gevent worker，每个 SSE 连接是一个协程而不是一个系统线程:
+
+    gunicorn -k gevent -w $(nproc) --worker-connections 1000 --timeout 0 -b 0.0.0.0:5001 wsgi:app
+
+本地开发仍可直接运行 python app.py
+"""
+
+# 必须在导入 app（以及 requests 等网络库）之前打补丁，使网络和文件 I/O 能够协作式让出
+from gevent import monkey
+monkey.patch_all()
+
+from app import app  # noqa: E402
+
+application = app
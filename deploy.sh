@@ -37,7 +37,7 @@ echo "🔧 配置后端..."
 cd backend
 python3 -m venv venv
 source venv/bin/activate
-pip install Flask Flask-Cors requests pydub PyPDF2 beautifulsoup4 lxml
+pip install Flask Flask-Cors requests pydub PyPDF2 beautifulsoup4 lxml streaming-form-data orjson gunicorn gevent
 
 # 确保 app.py 监听所有接口
 if ! grep -q "host='0.0.0.0'" app.py; then
@@ -62,7 +62,10 @@ npm run build
 echo "🚀 启动后端服务..."
 cd ../backend
 pm2 delete podcast-backend 2>/dev/null || true
-pm2 start app.py --interpreter ./venv/bin/python3 --name podcast-backend
+# 下载文件交给 Nginx 直接发送（见下方 /protected/ 配置）
+# 使用 gunicorn + gevent worker，每个 SSE 连接是一个协程
+X_ACCEL_REDIRECT_PREFIX=/protected/ pm2 start ./venv/bin/gunicorn --interpreter ./venv/bin/python3 --name podcast-backend -- \
+    -k gevent -w $(nproc) --worker-connections 1000 --timeout 0 -b 0.0.0.0:5001 wsgi:app
 pm2 save
 pm2 startup | tail -n 1 | bash  # 设置开机自启
 
@@ -73,6 +76,9 @@ server {
     listen 80;
     server_name 47.103.24.213;
 
+    # 与后端 UPLOAD_LIMITS["max_content_length"] 保持一致
+    client_max_body_size 64m;
+
     # 前端
     location / {
         root /home/mibo/ai_podcast_v1/frontend/build;
@@ -97,6 +103,20 @@ server {
         proxy_read_timeout 600s;
     }
 
+    # 下载接口（反向代理到后端，由后端校验后通过 X-Accel-Redirect 交回 Nginx 发送）
+    location /download/ {
+        proxy_pass http://localhost:5001/download/;
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+    }
+
+    # 输出文件（仅供 X-Accel-Redirect 内部跳转）
+    location /protected/ {
+        internal;
+        alias /home/mibo/ai_podcast_v1/backend/backend/outputs/;
+    }
+
     # 静态资源
     location /outputs/ {
         alias /home/mibo/ai_podcast_v1/backend/outputs/;